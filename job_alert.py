@@ -6,68 +6,263 @@ and sends email notifications via Resend API.
 """
 
 import os
-import json
 import time
-import schedule
-import re
+import hashlib
+import sqlite3
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from html import escape
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Set
+from typing import Callable, List, Dict, Optional, Tuple
+import ijson
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
 
-# Load environment variables
-load_dotenv()
+# Interval in minutes between checks when CHECK_INTERVAL_MINUTES is unset or invalid
+DEFAULT_CHECK_INTERVAL_MINUTES = 180
 
-# Configuration
-FIRECRAWL_API_KEY = os.getenv("FIRECRAWL_API_KEY")
-RESEND_API_KEY = os.getenv("RESEND_API_KEY")
-EMAIL_TO = os.getenv("EMAIL")
+JOBS_DB_FILE = Path("jobs_db.json")
+SEEN_JOBS_DB_FILE = Path("jobs_db.sqlite")
 
-# Interval in minutes between checks (env may be a string)
-try:
-    CHECK_INTERVAL_MINUTES = int(os.getenv("CHECK_INTERVAL_MINUTES"))
-except (TypeError, ValueError):
-    CHECK_INTERVAL_MINUTES = 180
+# Jobs found by a Firecrawl request are reused for this many seconds
+FIRECRAWL_CACHE_TTL_SECONDS = 600
+FIRECRAWL_CACHE_MAXSIZE = 8
+
+# Scrape response fields that may carry the page, in order of preference
+# (v1/v2 nest them under "data", older formats put them at the top level)
+SCRAPE_CONTENT_FIELDS = ('data.html', 'data.markdown', 'data.content', 'html', 'markdown', 'content')
+
+# CSS selectors used when parsing the offers list
+OFFER_CARD_SELECTOR = '[data-test="default-offer"]'
+JOB_LINK_SELECTOR = 'a[href*="/praca/"], a[href*="/oferta/"], a[href*="/job/"]'
+COMPANY_SELECTOR = ', '.join(
+    f'{tag}[class*="{word}" i]' for word in ('company', 'firma') for tag in ('span', 'div', 'p')
+)
+LOCATION_SELECTOR = ', '.join(
+    f'{tag}[class*="{word}" i]' for word in ('location', 'miasto', 'city') for tag in ('span', 'div', 'p')
+)
+
+# Email templates, filled in with str.format()
+EMAIL_HTML_HEADER = """
+        <html>
+        <head>
+            <style>
+                body {{ font-family: Arial, sans-serif; }}
+                .job {{ margin: 20px 0; padding: 15px; border-left: 4px solid #007bff; background-color: #f8f9fa; }}
+                .job-title {{ font-size: 18px; font-weight: bold; color: #007bff; }}
+                .job-company {{ font-size: 14px; color: #666; margin: 5px 0; }}
+                .job-location {{ font-size: 14px; color: #666; }}
+                .job-link {{ margin-top: 10px; }}
+                .job-link a {{ color: #007bff; text-decoration: none; }}
+            </style>
+        </head>
+        <body>
+            <h2>New React Job Postings Found</h2>
+            <p>Found {count} new job posting(s) on {url}</p>
+        """
+
+EMAIL_JOB_HTML = """
+            <div class="job">
+                <div class="job-title">{title}</div>
+                <div class="job-company">{company}</div>
+                <div class="job-location">{location}</div>
+                <div class="job-link"><a href="{link}">View Job →</a></div>
+            </div>
+            """
+
+EMAIL_HTML_FOOTER = """
+            <hr>
+            <p style="color: #666; font-size: 12px;">
+                This is an automated job alert. Checked at: {checked_at}
+            </p>
+        </body>
+        </html>
+        """
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """Settings read from the environment (and .env file)."""
+    firecrawl_api_key: str
+    resend_api_key: str
+    email_to: str
+    job_board_url: str
+    check_interval_minutes: int
+
+
+def _require_env(name: str) -> str:
+    """Return a required environment variable or exit with a clear message."""
+    value = os.getenv(name)
+    if not value:
+        raise SystemExit(f"{name} not set in environment variables")
+    return value
 
-JOBS_DB_FILE = Path("jobs_db.json")
 
-# URL of the job board to monitor
-JOB_BOARD_URL = os.getenv("SITE_URL")
+@lru_cache(maxsize=1)
+def get_config() -> Config:
+    """Load and validate configuration once."""
+    load_dotenv()
+    
+    # Interval in minutes between checks (env may be a string)
+    interval = os.getenv("CHECK_INTERVAL_MINUTES")
+    try:
+        check_interval_minutes = int(interval)
+        if check_interval_minutes <= 0:
+            raise ValueError(interval)
+    except (TypeError, ValueError):
+        if interval is not None:
+            print(f"Invalid CHECK_INTERVAL_MINUTES {interval!r}, using {DEFAULT_CHECK_INTERVAL_MINUTES}")
+        check_interval_minutes = DEFAULT_CHECK_INTERVAL_MINUTES
+    
+    return Config(
+        firecrawl_api_key=_require_env("FIRECRAWL_API_KEY"),
+        resend_api_key=_require_env("RESEND_API_KEY"),
+        email_to=_require_env("EMAIL"),
+        job_board_url=_require_env("SITE_URL"),
+        check_interval_minutes=check_interval_minutes
+    )
 
 
 class JobAlert:
     def __init__(self):
-        self.seen_job_ids: Set[str] = set()
-        self.load_seen_jobs()
+        self.config = get_config()
+        self.db = sqlite3.connect(SEEN_JOBS_DB_FILE)
+        self.db.execute("CREATE TABLE IF NOT EXISTS seen(id TEXT PRIMARY KEY, ts TEXT)")
+        # Last Firecrawl scrape endpoint/payload combination that returned jobs
+        self.last_endpoint: Optional[str] = None
+        self.last_payload_idx: Optional[int] = None
+        # Last Firecrawl extract endpoint/payload combination that returned jobs
+        self.last_extract_endpoint: Optional[str] = None
+        self.last_extract_payload_idx: Optional[int] = None
+        # Which strategy ("extract" or "scrape") last returned jobs
+        self.last_strategy: Optional[str] = None
+        self.load_state()
+        self.session = self._create_session()
+        self._firecrawl_cache: Dict[bytes, Tuple[float, List[Dict]]] = {}
+    
+    def _create_session(self) -> requests.Session:
+        """Create a pooled HTTP session reused for all Firecrawl/Resend calls."""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=4,
+            # Every call is a POST, which urllib3 never retries on read errors or
+            # status codes, so only retry failed connections
+            max_retries=Retry(
+                connect=3,
+                read=0,
+                status=0,
+                backoff_factor=0.5
+            )
+        )
+        session.mount("https://", adapter)
+        return session
+    
+    def _cached_firecrawl_jobs(self, endpoint: str, payload: Dict, fetch: Callable[[], List[Dict]]) -> List[Dict]:
+        """Return jobs found for this endpoint/payload within the TTL window, else fetch them."""
+        payload_json = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+        key = hashlib.blake2b(endpoint.encode('utf-8') + b"\n" + payload_json).digest()
+        now = time.monotonic()
+        
+        # Drop expired entries on every lookup so nothing stale outlives a check
+        self._firecrawl_cache = {
+            k: v for k, v in self._firecrawl_cache.items()
+            if now - v[0] < FIRECRAWL_CACHE_TTL_SECONDS
+        }
+        cached = self._firecrawl_cache.pop(key, None)
+        if cached:
+            self._firecrawl_cache[key] = cached
+            return cached[1]
+        
+        jobs = fetch()
+        if jobs:
+            # Evict the least recently used entry if full
+            if len(self._firecrawl_cache) >= FIRECRAWL_CACHE_MAXSIZE:
+                del self._firecrawl_cache[next(iter(self._firecrawl_cache))]
+            self._firecrawl_cache[key] = (time.monotonic(), jobs)
+        return jobs
     
-    def load_seen_jobs(self):
-        """Load previously seen job IDs from database file."""
+    def _probe_combos(
+        self,
+        combos: List[Tuple[str, int]],
+        last_combo: Tuple[Optional[str], Optional[int]],
+        attempt: Callable[[str, int], List[Dict]]
+    ) -> Optional[Tuple[Tuple[str, int], List[Dict]]]:
+        """
+        Try each endpoint/payload combination in turn, starting with the one
+        that worked last time, and return (combo, jobs) for the first that finds
+        jobs. Attempts are serial so a healthy check costs a single request and
+        no paid call is made after one succeeds.
+        """
+        if last_combo in combos:
+            combos = [last_combo] + [combo for combo in combos if combo != last_combo]
+        
+        for combo in combos:
+            jobs = attempt(*combo)
+            if jobs:
+                return combo, jobs
+        
+        return None
+    
+    def close(self):
+        """Close the underlying HTTP session and the seen-jobs database."""
+        self.session.close()
+        self.db.close()
+    
+    def load_state(self):
+        """Load scraper state from the JSON database file."""
         if JOBS_DB_FILE.exists():
             try:
-                with open(JOBS_DB_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.seen_job_ids = set(data.get('seen_job_ids', []))
+                with open(JOBS_DB_FILE, 'rb') as f:
+                    data = orjson.loads(f.read())
+                    self.last_endpoint = data.get('last_endpoint')
+                    self.last_payload_idx = data.get('last_payload_idx')
+                    self.last_extract_endpoint = data.get('last_extract_endpoint')
+                    self.last_extract_payload_idx = data.get('last_extract_payload_idx')
+                    self.last_strategy = data.get('last_strategy')
             except Exception as e:
                 print(f"Error loading jobs database: {e}")
     
-    def save_seen_jobs(self):
-        """Save seen job IDs to database file."""
+    def save_state(self):
+        """Save scraper state to the JSON database file."""
         try:
-            with open(JOBS_DB_FILE, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'seen_job_ids': list(self.seen_job_ids),
+            with open(JOBS_DB_FILE, 'wb') as f:
+                f.write(orjson.dumps({
+                    'last_endpoint': self.last_endpoint,
+                    'last_payload_idx': self.last_payload_idx,
+                    'last_extract_endpoint': self.last_extract_endpoint,
+                    'last_extract_payload_idx': self.last_extract_payload_idx,
+                    'last_strategy': self.last_strategy,
                     'last_updated': datetime.now().isoformat()
-                }, f, indent=2, ensure_ascii=False)
+                }, option=orjson.OPT_INDENT_2))
         except Exception as e:
             print(f"Error saving jobs database: {e}")
     
+    def is_job_seen(self, job_id: str) -> bool:
+        """Check whether a job ID is already in the seen-jobs database."""
+        return self.db.execute("SELECT 1 FROM seen WHERE id = ?", (job_id,)).fetchone() is not None
+    
+    def mark_jobs_seen(self, job_ids: List[str]):
+        """Record job IDs in the seen-jobs database."""
+        ts = datetime.now().isoformat()
+        with self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO seen VALUES (?, ?)",
+                ((job_id, ts) for job_id in job_ids)
+            )
+    
+    def count_seen_jobs(self) -> int:
+        """Return the number of job IDs in the seen-jobs database."""
+        return self.db.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+    
     def scrape_jobs_with_firecrawl(self) -> List[Dict]:
         """Scrape job listings using Firecrawl API."""
-        if not FIRECRAWL_API_KEY:
-            raise ValueError("FIRECRAWL_API_KEY not set in environment variables")
-        
         # Try v2 endpoint first, then fall back to v1
         endpoints = [
             "https://api.firecrawl.dev/v2/scrape",
@@ -75,75 +270,95 @@ class JobAlert:
         ]
         
         headers = {
-            "Authorization": f"Bearer {FIRECRAWL_API_KEY}",
+            "Authorization": f"Bearer {self.config.firecrawl_api_key}",
             "Content-Type": "application/json"
         }
         
         # Try v2 format first with selector to only get offers-list element
         payloads = [
             {
-                "url": JOB_BOARD_URL,
+                "url": self.config.job_board_url,
                 "formats": ["html", "markdown"],
                 "selectors": ["#offers-list"]
             },
             {
-                "url": JOB_BOARD_URL,
+                "url": self.config.job_board_url,
                 "formats": ["html", "markdown"]
             },
             {
-                "url": JOB_BOARD_URL,
+                "url": self.config.job_board_url,
                 "pageOptions": {
                     "onlyMainContent": False
                 }
             }
         ]
         
-        # Try each endpoint with each payload format
-        for endpoint in endpoints:
-            for payload in payloads:
-                try:
-                    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Scraping jobs from {JOB_BOARD_URL}...")
-                    response = requests.post(endpoint, json=payload, headers=headers, timeout=30)
-                    
-                    # Get error details if request failed
-                    if response.status_code != 200:
-                        error_text = response.text
-                        try:
-                            error_json = response.json()
-                            print(f"Firecrawl API error ({response.status_code}): {error_json}")
-                        except:
-                            print(f"Firecrawl API error ({response.status_code}): {error_text}")
-                        continue
-                    
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                    # Handle different response formats
-                    if isinstance(data, dict):
-                        if not data.get('success', True):  # v1 uses 'success', v2 might not
-                            error_msg = data.get('error', 'Unknown error')
-                            print(f"Firecrawl API error: {error_msg}")
-                            continue
-                        
-                        # Extract content - try different response structures
-                        content_data = data.get('data', data)
-                        html_content = (
-                            content_data.get('html', '') or 
-                            content_data.get('markdown', '') or
-                            content_data.get('content', '')
-                        )
-                    else:
-                        html_content = str(data)
-                    
-                    if html_content:
-                        jobs = self.parse_jobs_from_html(html_content)
-                        if jobs:
-                            print(f"Found {len(jobs)} job listings")
-                            return jobs
-                    
-                except requests.exceptions.RequestException as e:
-                    print(f"Error with {endpoint}: {e}")
-                    continue
+        combos = [(endpoint, idx) for endpoint in endpoints for idx in range(len(payloads))]
+        last_combo = (self.last_endpoint, self.last_payload_idx)
+        result = self._probe_combos(
+            combos, last_combo,
+            lambda endpoint, idx: self._scrape_once(endpoint, payloads[idx], headers)
+        )
+        if result:
+            combo, jobs = result
+            if combo != last_combo:
+                self.last_endpoint, self.last_payload_idx = combo
+                self.save_state()
+            return jobs
+        
+        return []
+    
+    def _scrape_once(self, endpoint: str, payload: Dict, headers: Dict) -> List[Dict]:
+        """Scrape job listings with a single Firecrawl endpoint/payload combination."""
+        return self._cached_firecrawl_jobs(
+            endpoint, payload, partial(self._fetch_scraped_jobs, endpoint, payload, headers)
+        )
+    
+    def _fetch_scraped_jobs(self, endpoint: str, payload: Dict, headers: Dict) -> List[Dict]:
+        """POST a Firecrawl scrape request and parse the job listings it returns."""
+        try:
+            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Scraping jobs from {self.config.job_board_url}...")
+            with self.session.post(endpoint, json=payload, headers=headers, timeout=30, stream=True) as response:
+                # Get error details if request failed
+                if response.status_code != 200:
+                    error_text = response.text
+                    try:
+                        error_json = orjson.loads(response.content)
+                        print(f"Firecrawl API error ({response.status_code}): {error_json}")
+                    except:
+                        print(f"Firecrawl API error ({response.status_code}): {error_text}")
+                    return []
+                
+                response.raise_for_status()
+                
+                # Stream the body through ijson and keep only the preferred content
+                # field, so neither the raw body nor the markdown copy is held whole
+                response.raw.decode_content = True
+                success = True  # v1 uses 'success', v2 might not
+                error_msg = 'Unknown error'
+                html_content = ''
+                rank = len(SCRAPE_CONTENT_FIELDS)
+                for prefix, event, value in ijson.parse(response.raw):
+                    if prefix == 'success' and event == 'boolean':
+                        success = value
+                    elif prefix == 'error' and event == 'string':
+                        error_msg = value
+                    elif event == 'string' and prefix in SCRAPE_CONTENT_FIELDS[:rank]:
+                        html_content = value
+                        rank = SCRAPE_CONTENT_FIELDS.index(prefix)
+            
+            if not success:
+                print(f"Firecrawl API error: {error_msg}")
+                return []
+            
+            if html_content:
+                jobs = self.parse_jobs_from_html(html_content)
+                if jobs:
+                    print(f"Found {len(jobs)} job listings")
+                    return jobs
+            
+        except (requests.exceptions.RequestException, Urllib3HTTPError, ijson.JSONError) as e:
+            print(f"Error with {endpoint}: {e}")
         
         return []
     
@@ -158,25 +373,36 @@ class JobAlert:
             return jobs
         
         try:
-            # Parse HTML with BeautifulSoup
-            soup = BeautifulSoup(html_content, 'html.parser')
+            # Parse HTML with selectolax (lexbor engine)
+            tree = LexborHTMLParser(html_content)
             
             # Find the offers-list element - this is the main container for job listings
-            offers_list = soup.find(id='offers-list')
+            offers_list = tree.css_first('#offers-list')
             
             # if not offers_list:
             #     print("Warning: Element with id='offers-list' not found in HTML")
             #     return jobs
             
-            # Only search for job listings within the offers-list element
-            # Look for links that might be job postings
-            job_links = offers_list.find_all('a', href=re.compile(r'/praca/|/oferta/|/job/'))
+            # Only search for job listings within the offers-list element.
+            # Walk offer cards once, taking the first job link with a meaningful
+            # title (same length rule as below, so badges are skipped) and the
+            # company/location from the same card; fall back to every job link
+            # and its parent when the page has no recognisable cards.
+            cards = offers_list.css(OFFER_CARD_SELECTOR)
+            if cards:
+                offers = []
+                for card in cards:
+                    link = next((a for a in card.css(JOB_LINK_SELECTOR) if len(a.text(strip=True)) >= 5), None)
+                    if link is not None:
+                        offers.append((link, card))
+            else:
+                offers = [(link, link.parent) for link in offers_list.css(JOB_LINK_SELECTOR)]
             
             seen_titles = set()
-            for link in job_links:
+            for link, container in offers:
                 # Extract job information
-                title = link.get_text(strip=True)
-                href = link.get('href', '')
+                title = link.text(strip=True)
+                href = link.attributes.get('href') or ''
                 
                 # Skip if no meaningful title or duplicate
                 if not title or len(title) < 5 or title in seen_titles:
@@ -190,18 +416,17 @@ class JobAlert:
                 
                 # Try to find company name nearby
                 company = "Unknown"
-                parent = link.find_parent()
-                if parent:
-                    company_elem = parent.find(['span', 'div', 'p'], class_=re.compile(r'company|firma', re.I))
+                if container:
+                    company_elem = container.css_first(COMPANY_SELECTOR)
                     if company_elem:
-                        company = company_elem.get_text(strip=True)
+                        company = company_elem.text(strip=True)
                 
                 # Try to find location
                 location = "Location not specified"
-                if parent:
-                    location_elem = parent.find(['span', 'div', 'p'], class_=re.compile(r'location|miasto|city', re.I))
+                if container:
+                    location_elem = container.css_first(LOCATION_SELECTOR)
                     if location_elem:
-                        location = location_elem.get_text(strip=True)
+                        location = location_elem.text(strip=True)
                 
                 job = {
                     'title': title,
@@ -209,6 +434,7 @@ class JobAlert:
                     'location': location,
                     'link': href
                 }
+                job['id'] = self.get_job_id(job)
                 
                 jobs.append(job)
                 seen_titles.add(title)
@@ -220,9 +446,6 @@ class JobAlert:
     
     def scrape_jobs_with_firecrawl_extract(self) -> List[Dict]:
         """Use Firecrawl's extract endpoint for better structured data."""
-        if not FIRECRAWL_API_KEY:
-            raise ValueError("FIRECRAWL_API_KEY not set in environment variables")
-        
         # Try v2 endpoint first
         endpoints = [
             "https://api.firecrawl.dev/v2/extract",
@@ -230,7 +453,7 @@ class JobAlert:
         ]
         
         headers = {
-            "Authorization": f"Bearer {FIRECRAWL_API_KEY}",
+            "Authorization": f"Bearer {self.config.firecrawl_api_key}",
             "Content-Type": "application/json"
         }
         
@@ -257,14 +480,14 @@ class JobAlert:
         # Try different payload formats
         payloads = [
             {
-                "url": JOB_BOARD_URL,
+                "url": self.config.job_board_url,
                 "extractorOptions": {
                     "mode": "llm-extract",
                     "schema": schema
                 }
             },
             {
-                "urls": [JOB_BOARD_URL],
+                "urls": [self.config.job_board_url],
                 "extractorOptions": {
                     "mode": "llm-extract",
                     "schema": schema
@@ -272,146 +495,132 @@ class JobAlert:
             }
         ]
         
-        for endpoint in endpoints:
-            for payload in payloads:
+        combos = [(endpoint, idx) for endpoint in endpoints for idx in range(len(payloads))]
+        last_combo = (self.last_extract_endpoint, self.last_extract_payload_idx)
+        result = self._probe_combos(
+            combos, last_combo,
+            lambda endpoint, idx: self._extract_once(endpoint, payloads[idx], headers)
+        )
+        if result:
+            combo, jobs = result
+            if combo != last_combo:
+                self.last_extract_endpoint, self.last_extract_payload_idx = combo
+                self.save_state()
+            return jobs
+        
+        return []
+    
+    def _extract_once(self, endpoint: str, payload: Dict, headers: Dict) -> List[Dict]:
+        """Extract job listings with a single Firecrawl endpoint/payload combination."""
+        return self._cached_firecrawl_jobs(
+            endpoint, payload, partial(self._fetch_extracted_jobs, endpoint, payload, headers)
+        )
+    
+    def _fetch_extracted_jobs(self, endpoint: str, payload: Dict, headers: Dict) -> List[Dict]:
+        """POST a Firecrawl extract request and return the job listings it contains."""
+        try:
+            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Extracting jobs from {self.config.job_board_url}...")
+            response = self.session.post(endpoint, json=payload, headers=headers, timeout=60)
+            
+            # Get error details if request failed
+            if response.status_code != 200:
+                error_text = response.text
                 try:
-                    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Extracting jobs from {JOB_BOARD_URL}...")
-                    response = requests.post(endpoint, json=payload, headers=headers, timeout=60)
-                    
-                    # Get error details if request failed
-                    if response.status_code != 200:
-                        error_text = response.text
-                        try:
-                            error_json = response.json()
-                            print(f"Firecrawl extract API error ({response.status_code}): {error_json}")
-                        except:
-                            print(f"Firecrawl extract API error ({response.status_code}): {error_text}")
-                        continue
-                    
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                    # Handle different response formats
-                    if isinstance(data, dict):
-                        if not data.get('success', True):
-                            error_msg = data.get('error', 'Unknown error')
-                            print(f"Firecrawl API error: {error_msg}")
-                            continue
-                        
-                        # Extract jobs from response
-                        extracted_data = data.get('data', data)
-                        
-                        # Handle array response (v2 might return array)
-                        if isinstance(extracted_data, list):
-                            extracted_data = extracted_data[0] if extracted_data else {}
-                        
-                        jobs = extracted_data.get('jobs', [])
-                        
-                        # Generate unique IDs for jobs if not present
-                        for job in jobs:
-                            if 'id' not in job:
-                                job_id = f"{job.get('title', '')}_{job.get('company', '')}_{job.get('link', '')}"
-                                job['id'] = hash(job_id) % (10 ** 10)
-                        
-                        if jobs:
-                            print(f"Found {len(jobs)} job listings")
-                            return jobs
-                    
-                except requests.exceptions.RequestException as e:
-                    print(f"Error with {endpoint}: {e}")
-                    continue
+                    error_json = orjson.loads(response.content)
+                    print(f"Firecrawl extract API error ({response.status_code}): {error_json}")
+                except:
+                    print(f"Firecrawl extract API error ({response.status_code}): {error_text}")
+                return []
+            
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+            
+            # Handle different response formats
+            if isinstance(data, dict):
+                if not data.get('success', True):
+                    error_msg = data.get('error', 'Unknown error')
+                    print(f"Firecrawl API error: {error_msg}")
+                    return []
+                
+                # Extract jobs from response
+                extracted_data = data.get('data', data)
+                
+                # Handle array response (v2 might return array)
+                if isinstance(extracted_data, list):
+                    extracted_data = extracted_data[0] if extracted_data else {}
+                
+                jobs = extracted_data.get('jobs', [])
+                
+                # Generate stable IDs used for deduplication
+                for job in jobs:
+                    job['id'] = self.get_job_id(job)
+                
+                if jobs:
+                    print(f"Found {len(jobs)} job listings")
+                    return jobs
+            
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+            print(f"Error with {endpoint}: {e}")
         
         return []
     
     def get_job_id(self, job: Dict) -> str:
         """Generate a unique ID for a job posting."""
-        # Use link if available, otherwise create from title + company
-        if 'link' in job and job['link']:
-            return str(hash(job['link']) % (10 ** 10))
-        return str(hash(f"{job.get('title', '')}_{job.get('company', '')}") % (10 ** 10))
+        # Use link if available, otherwise create from title + company.
+        # blake2b is stable across runs, unlike the salted built-in hash().
+        key = job.get('link') or f"{job.get('title', '')}|{job.get('company', '')}"
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=10).hexdigest()
     
     def send_email(self, jobs: List[Dict]):
         """Send email notification via Resend API."""
-        if not RESEND_API_KEY:
-            raise ValueError("RESEND_API_KEY not set in environment variables")
-        
         if not jobs:
             return
         
         url = "https://api.resend.com/emails"
         headers = {
-            "Authorization": f"Bearer {RESEND_API_KEY}",
+            "Authorization": f"Bearer {self.config.resend_api_key}",
             "Content-Type": "application/json"
         }
         
         # Create email content
         subject = f"New React Job Postings Found ({len(jobs)} new)"
         
-        html_body = f"""
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; }}
-                .job {{ margin: 20px 0; padding: 15px; border-left: 4px solid #007bff; background-color: #f8f9fa; }}
-                .job-title {{ font-size: 18px; font-weight: bold; color: #007bff; }}
-                .job-company {{ font-size: 14px; color: #666; margin: 5px 0; }}
-                .job-location {{ font-size: 14px; color: #666; }}
-                .job-link {{ margin-top: 10px; }}
-                .job-link a {{ color: #007bff; text-decoration: none; }}
-            </style>
-        </head>
-        <body>
-            <h2>New React Job Postings Found</h2>
-            <p>Found {len(jobs)} new job posting(s) on {JOB_BOARD_URL}</p>
-        """
-        
+        # Scraped fields may contain markup characters, so escape them all
+        html_parts = [EMAIL_HTML_HEADER.format(count=len(jobs), url=escape(self.config.job_board_url))]
         for job in jobs:
-            title = job.get('title', 'No title')
-            company = job.get('company', 'Unknown company')
-            location = job.get('location', 'Location not specified')
-            link = job.get('link', JOB_BOARD_URL)
-            
-            html_body += f"""
-            <div class="job">
-                <div class="job-title">{title}</div>
-                <div class="job-company">{company}</div>
-                <div class="job-location">{location}</div>
-                <div class="job-link"><a href="{link}">View Job →</a></div>
-            </div>
-            """
+            html_parts.append(EMAIL_JOB_HTML.format(
+                title=escape(str(job.get('title', 'No title'))),
+                company=escape(str(job.get('company', 'Unknown company'))),
+                location=escape(str(job.get('location', 'Location not specified'))),
+                link=escape(str(job.get('link', self.config.job_board_url)), quote=True)
+            ))
+        html_parts.append(EMAIL_HTML_FOOTER.format(checked_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+        html_body = "".join(html_parts)
         
-        html_body += """
-            <hr>
-            <p style="color: #666; font-size: 12px;">
-                This is an automated job alert. Checked at: """ + datetime.now().strftime('%Y-%m-%d %H:%M:%S') + """
-            </p>
-        </body>
-        </html>
-        """
-        
-        text_body = f"New React Job Postings Found\n\nFound {len(jobs)} new job posting(s):\n\n"
+        text_parts = [f"New React Job Postings Found\n\nFound {len(jobs)} new job posting(s):\n\n"]
         for job in jobs:
-            text_body += f"- {job.get('title', 'No title')} at {job.get('company', 'Unknown')}\n"
+            text_parts.append(f"- {job.get('title', 'No title')} at {job.get('company', 'Unknown')}\n")
             if job.get('link'):
-                text_body += f"  Link: {job.get('link')}\n"
-            text_body += "\n"
+                text_parts.append(f"  Link: {job.get('link')}\n")
+            text_parts.append("\n")
+        text_body = "".join(text_parts)
         
         payload = {
             "from": "Job Alert <onboarding@resend.dev>",  # Update with your verified domain
-            "to": [EMAIL_TO],
+            "to": [self.config.email_to],
             "subject": subject,
             "html": html_body,
             "text": text_body
         }
         
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response = self.session.post(url, json=payload, headers=headers, timeout=30)
             response.raise_for_status()
             
-            result = response.json()
+            result = orjson.loads(response.content)
             print(f"Email sent successfully! ID: {result.get('id')}")
             
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
             print(f"Error sending email: {e}")
             if hasattr(e, 'response') and e.response is not None:
                 print(f"Response: {e.response.text}")
@@ -419,29 +628,38 @@ class JobAlert:
     def check_for_new_jobs(self):
         """Main function to check for new jobs and send notifications."""
         try:
-            # Try extract endpoint first (better structured data)
-            jobs = self.scrape_jobs_with_firecrawl_extract()
+            # Prefer extract (better structured data) unless scrape worked last
+            # time; only fall back to the other strategy when no jobs are found
+            strategies = [
+                ("extract", self.scrape_jobs_with_firecrawl_extract),
+                ("scrape", self.scrape_jobs_with_firecrawl)
+            ]
+            if self.last_strategy == "scrape":
+                strategies.reverse()
             
-            # If extract fails or returns no jobs, fall back to scrape
-            if not jobs:
-                jobs = self.scrape_jobs_with_firecrawl()
+            jobs = []
+            for name, strategy in strategies:
+                jobs = strategy()
+                if jobs:
+                    if name != self.last_strategy:
+                        self.last_strategy = name
+                        self.save_state()
+                    break
             
             if not jobs:
                 print("No jobs found or error occurred")
                 return
             
             # Filter out jobs we've already seen
-            new_jobs = []
+            new_jobs = {}
             for job in jobs:
-                job_id = self.get_job_id(job)
-                if job_id not in self.seen_job_ids:
-                    new_jobs.append(job)
-                    self.seen_job_ids.add(job_id)
+                if job['id'] not in new_jobs and not self.is_job_seen(job['id']):
+                    new_jobs[job['id']] = job
             
             if new_jobs:
                 print(f"Found {len(new_jobs)} new job(s)! Sending email...")
-                self.send_email(new_jobs)
-                self.save_seen_jobs()
+                self.send_email(list(new_jobs.values()))
+                self.mark_jobs_seen(list(new_jobs))
             else:
                 print("No new jobs found")
             
@@ -453,25 +671,24 @@ class JobAlert:
     def run(self):
         """Start the job alert scheduler."""
         print(f"Starting Job Alert System")
-        print(f"Checking every {CHECK_INTERVAL_MINUTES} minutes")
-        print(f"Target URL: {JOB_BOARD_URL}")
-        print(f"Email notifications to: {EMAIL_TO}")
-        print(f"Already tracking {len(self.seen_job_ids)} jobs")
+        print(f"Checking every {self.config.check_interval_minutes} minutes")
+        print(f"Target URL: {self.config.job_board_url}")
+        print(f"Email notifications to: {self.config.email_to}")
+        print(f"Already tracking {self.count_seen_jobs()} jobs")
         print("-" * 50)
         
-        # Run immediately on start
-        self.check_for_new_jobs()
-        
-        # Schedule recurring checks
-        schedule.every(CHECK_INTERVAL_MINUTES).minutes.do(self.check_for_new_jobs)
-        
-        # Keep running
+        # Run immediately on start, then sleep until the next check is due
+        interval_seconds = self.config.check_interval_minutes * 60
         while True:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute for scheduled tasks
+            started = time.monotonic()
+            self.check_for_new_jobs()
+            time.sleep(max(1, interval_seconds - (time.monotonic() - started)))
 
 
 if __name__ == "__main__":
     alert = JobAlert()
-    alert.run()
+    try:
+        alert.run()
+    finally:
+        alert.close()
 